@@ -1,10 +1,62 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.routers.v2 import router as v2_router
+from app.services.upload import MAX_UPLOAD_BYTES, MULTIPART_OVERHEAD
 import os
 
 app = FastAPI(title="Finans Panel API", version="0.2.0")
 
+class UploadLimitMiddleware:
+    """
+    Gövde boyutu sınırı, multipart parse'tan önce:
+    - Content-Length sınırı aşıyorsa gövde hiç okunmadan 413
+    - Content-Length yoksa (chunked) gelen byte'lar sayılır; sınır aşıldığı anda 413
+    """
+    def __init__(self, app, limit: int):
+        self.app = app
+        self.limit = limit
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        cl = dict(scope.get("headers") or []).get(b"content-length", b"")
+        if cl.isdigit() and int(cl) > self.limit:
+            return await _too_large(scope, receive, send)
+
+        seen = 0
+        started = False
+
+        async def counting_receive():
+            nonlocal seen
+            msg = await receive()
+            if msg["type"] == "http.request":
+                seen += len(msg.get("body", b""))
+                if seen > self.limit:
+                    raise HTTPException(status_code=413, detail=_too_large_detail())
+            return msg
+
+        async def tracking_send(msg):
+            nonlocal started
+            started = started or msg["type"] == "http.response.start"
+            await send(msg)
+
+        try:
+            await self.app(scope, counting_receive, tracking_send)
+        except HTTPException as e:
+            if e.status_code != 413 or started:
+                raise
+            await _too_large(scope, receive, send)
+
+def _too_large_detail() -> str:
+    return f"Dosya çok büyük (maks. {MAX_UPLOAD_BYTES / (1024 * 1024):g} MB)"
+
+async def _too_large(scope, receive, send):
+    await JSONResponse(status_code=413, content={"detail": _too_large_detail()})(scope, receive, send)
+
+app.add_middleware(UploadLimitMiddleware, limit=MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD)
+
 origins_env = os.getenv("API_CORS_ORIGINS")
 origins = origins_env.split(",") if origins_env else ["*"]
 
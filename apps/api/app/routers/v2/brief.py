@@ -2,13 +2,20 @@ from fastapi import APIRouter, UploadFile, File, HTTPException, Form
 from pydantic import BaseModel
 from typing import Optional, List, Tuple, Dict
 from collections import defaultdict, deque
+import numpy as np
+import os
 import pandas as pd
 
-from app.services.parse import read_df, col, to_dt, norm_reason, payment_str
-from app.services.matchers import build_key
+from app.services.parse import read_df, parse_upload, col, to_dt, norm_reasons, payment_str
+from app.services.matchers import build_keys
+from app.services.cache import LRUCache
+from app.services.upload import spool_upload
 
 router = APIRouter()
 
+# (sha256, is_csv, member_id, threshold) -> cycles-table sonucu
+_table_cache = LRUCache(maxsize=int(os.getenv("API_RESULT_CACHE_SIZE", "32")))
+
 # =========================
 # MODELLER
 # =========================
@@ -74,24 +81,130 @@ class BriefResponse(BaseModel):
     row6_top_profit: Row6_TopProfit
     currency: Optional[str] = None
 
+class CycleMetrics(BaseModel):
+    index: int
+    start_row: int
+    end_row: int
+    start_at: str
+    start_type: str               # "DEPOSIT" | "BONUS" | "ADJUSTMENT" | "" (start event yok)
+    wager_total: float            # Row2 ile aynı pencere
+    wager_count: int
+    profit: float                 # Kazanç (Σ BET_SETTLED, tüm cycle)
+    ggr: float                    # Kazanç - Σ |BET_PLACED| (tüm cycle)
+    open_total_amount: float
+    open_count: int
+    late_gap_count: int
+    late_gap_total_minutes: float
+
+class CyclesTableResponse(BaseModel):
+    filename: str
+    member_id: str
+    threshold_minutes: int
+    cycles: List[CycleMetrics]
+    currency: Optional[str] = None
+
 # =========================
 # HELPERLAR
 # =========================
-def _start_bounds(df: pd.DataFrame, reason_col: str, amt_col: str) -> List[Tuple[int, int]]:
+def _start_mask(df: pd.DataFrame, reason_col: str, amt_col: str) -> pd.Series:
     """
     Cycle başlangıcı: DEPOSIT | BONUS_GIVEN (FREE_SPIN_GIVEN normalize) | ADJUSTMENT (amt > 0).
     """
-    starts = df.index[
-        (df[reason_col].isin(["DEPOSIT", "BONUS_GIVEN"])) |
-        ((df[reason_col] == "ADJUSTMENT") & (df[amt_col] > 0))
-    ].tolist()
-    if not starts:
-        return [(0, len(df))]
-    bounds: List[Tuple[int, int]] = []
-    for i, s in enumerate(starts):
-        e = starts[i + 1] if i + 1 < len(starts) else len(df)
-        bounds.append((int(s), int(e)))
-    return bounds
+    return (df[reason_col].isin(["DEPOSIT", "BONUS_GIVEN"])) | ((df[reason_col] == "ADJUSTMENT") & (df[amt_col] > 0))
+
+def _start_bounds(df: pd.DataFrame, reason_col: str, amt_col: str) -> List[Tuple[int, int]]:
+    """
+    [start, end) cycle sınırları; _cycle_labels'ın etiket geçişlerinden türetilir.
+    """
+    if len(df) == 0:
+        return [(0, 0)]
+    lab = _cycle_labels(df, reason_col, amt_col)
+    starts = df.index[np.flatnonzero(np.diff(lab, prepend=-1) > 0)].tolist()
+    ends = starts[1:] + [len(df)]
+    return [(int(s), int(e)) for s, e in zip(starts, ends)]
+
+def _cycle_labels(df: pd.DataFrame, reason_col: str, amt_col: str) -> np.ndarray:
+    """
+    Satır başına cycle etiketi (start event'lerinin kümülatif sayısı - 1).
+    İlk start event'inden önceki satırlar -1 (hiçbir cycle'a ait değil).
+    """
+    start = _start_mask(df, reason_col, amt_col)
+    if not start.any():
+        return np.zeros(len(df), dtype=np.int64)
+    return start.to_numpy().cumsum() - 1
+
+def _cycles_table(df: pd.DataFrame, c_ts: str, c_ref: Optional[str], c_cid: Optional[str],
+                  threshold_minutes: int) -> List[CycleMetrics]:
+    """
+    Tüm cycle'lar için brief metrikleri tek geçişte: cycle etiketi groupby anahtarı olarak kullanılır.
+    Değerler, aynı cycle için /v2/brief'in Row2/Row3/Row4 çıktısıyla birebir aynıdır.
+    """
+    is_start = _start_mask(df, "__r", "_amt")
+    lab_all = _cycle_labels(df, "__r", "_amt")
+    d = df[lab_all >= 0]
+    lab = pd.Series(lab_all[lab_all >= 0], index=d.index)
+    n = int(lab.iloc[-1]) + 1
+    ts, r, amt = d[c_ts], d["__r"], d["_amt"]
+    pos = pd.Series(d.index, index=d.index)
+
+    # --- Sınırlar
+    start_ix = pos.groupby(lab).min().reindex(range(n))
+    end_ix = pos.groupby(lab).max().reindex(range(n))
+
+    # --- Row2 penceresi: cycle başı → cycle içindeki sonraki finansal olay (yoksa son satır)
+    fin_any = r.isin(["DEPOSIT", "BONUS_GIVEN", "ADJUSTMENT"])
+    nxt_ix = pos[fin_any & (pos != start_ix.to_numpy()[lab.to_numpy()])].groupby(lab).min().reindex(range(n))
+    to_ix = nxt_ix.fillna(end_ix).astype(np.int64)
+    win_from = ts.loc[start_ix.to_numpy()].to_numpy()[lab.to_numpy()]
+    win_to = ts.loc[to_ix.to_numpy()].to_numpy()[lab.to_numpy()]
+    placed = r == "BET_PLACED"
+    settled = r == "BET_SETTLED"
+    in_win = placed & (ts.to_numpy() >= win_from) & (ts.to_numpy() <= win_to)
+    wager_total = amt.abs()[in_win].groupby(lab[in_win]).sum().reindex(range(n), fill_value=0.0)
+    wager_count = in_win.groupby(lab).sum().reindex(range(n), fill_value=0)
+
+    profit = amt[settled].groupby(lab[settled]).sum().reindex(range(n), fill_value=0.0)
+    placed_sum = amt.abs()[placed].groupby(lab[placed]).sum().reindex(range(n), fill_value=0.0)
+
+    # --- Eşleşme: (cycle, key) içinde FIFO -> k. placed ile k. settled eşleşir
+    keys = build_keys(d, c_ref, c_cid, skip_na=True)
+    p = pd.DataFrame({"lab": lab[placed], "key": keys[placed], "ts": ts[placed], "amt": amt[placed].abs()})
+    q = pd.DataFrame({"lab": lab[settled], "key": keys[settled], "ts": ts[settled]})
+    p["k"] = p.groupby(["lab", "key"]).cumcount()
+    q["k"] = q.groupby(["lab", "key"]).cumcount()
+    n_settled = q.groupby(["lab", "key"]).size().rename("ns")
+    p = p.join(n_settled, on=["lab", "key"])
+    is_open = p["k"] >= p["ns"].fillna(0)
+    open_total = p.loc[is_open, "amt"].groupby(p.loc[is_open, "lab"]).sum().reindex(range(n), fill_value=0.0)
+    open_count = is_open.groupby(p["lab"]).sum().reindex(range(n), fill_value=0)
+
+    pairs = p[~is_open].merge(q, on=["lab", "key", "k"], suffixes=("_p", "_s"))
+    gap = (pairs["ts_s"] - pairs["ts_p"]).dt.total_seconds() / 60.0
+    late = gap > float(threshold_minutes)
+    late_count = late.groupby(pairs["lab"]).sum().reindex(range(n), fill_value=0)
+    late_total = gap[late].groupby(pairs.loc[late, "lab"]).sum().reindex(range(n), fill_value=0.0)
+
+    out: List[CycleMetrics] = []
+    for i in range(n):
+        s_i, e_i = int(start_ix.iloc[i]), int(end_ix.iloc[i])
+        r0 = d.loc[s_i, "__r"]
+        w = float(wager_total.iloc[i])
+        out.append(CycleMetrics(
+            index=i,
+            start_row=s_i,
+            end_row=e_i + 1,
+            start_at=_fmt(d.loc[s_i, c_ts]),
+            start_type=(("BONUS" if r0 == "BONUS_GIVEN" else r0) if is_start[s_i] else ""),
+            wager_total=round(w, 2),
+            wager_count=int(wager_count.iloc[i]),
+            profit=round(float(profit.iloc[i]), 2),
+            ggr=round(float(profit.iloc[i]) - float(placed_sum.iloc[i]), 2),
+            open_total_amount=round(float(open_total.iloc[i]), 2),
+            open_count=int(open_count.iloc[i]),
+            late_gap_count=int(late_count.iloc[i]),
+            late_gap_total_minutes=round(float(late_total.iloc[i]), 2),
+        ))
+    return out
 
 def _bonus_kind(txt: str) -> str:
     s = (txt or "").lower()
@@ -124,7 +237,7 @@ async def brief(
     threshold_minutes: int = Form(5),
 ):
     # --- Read & normalize ---
-    df, _ = read_df(file)
+    df, _ = await read_df(file)
 
     c_ts  = col(df, "Date & Time", "Date", "timestamp", "time")
     c_mb  = col(df, "Player ID", "member_id", "User ID", "Account ID")
@@ -143,7 +256,7 @@ async def brief(
 
     df[c_ts] = to_dt(df[c_ts])
     df = df.sort_values(c_ts).reset_index(drop=True)
-    df["__r"] = df[c_rs].apply(norm_reason)
+    df["__r"] = norm_reasons(df[c_rs])
     df["_amt"] = pd.to_numeric(df[c_am], errors="coerce").fillna(0.0)
 
     if member_id:
@@ -221,10 +334,11 @@ async def brief(
     # --- 3) Açık işlemler (placed var, settled yok) ---
     placed_ix  = cyc.index[cyc["__r"] == "BET_PLACED"].tolist()
     settled_ix = cyc.index[cyc["__r"] == "BET_SETTLED"].tolist()
+    keys = build_keys(cyc, c_ref, c_cid, skip_na=True)  # _key ile aynı
     pmap: Dict[str, deque] = defaultdict(deque)
     smap: Dict[str, deque] = defaultdict(deque)
-    for i in placed_ix:  pmap[_key(cyc, i, c_ref, c_cid)].append(i)
-    for i in settled_ix: smap[_key(cyc, i, c_ref, c_cid)].append(i)
+    for i in placed_ix:  pmap[keys[i]].append(i)
+    for i in settled_ix: smap[keys[i]].append(i)
 
     for key in set(pmap) | set(smap):
         ps, ss = pmap.get(key, deque()), smap.get(key, deque())
@@ -248,8 +362,8 @@ async def brief(
     # --- 4) Geç sonuçlanan (gap > threshold_minutes) ---
     pmap2: Dict[str, deque] = defaultdict(deque)
     smap2: Dict[str, deque] = defaultdict(deque)
-    for i in placed_ix:  pmap2[_key(cyc, i, c_ref, c_cid)].append(i)
-    for i in settled_ix: smap2[_key(cyc, i, c_ref, c_cid)].append(i)
+    for i in placed_ix:  pmap2[keys[i]].append(i)
+    for i in settled_ix: smap2[keys[i]].append(i)
 
     late_items: List[LateGapItem] = []
     late_total = 0.0
@@ -335,3 +449,58 @@ async def brief(
         row6_top_profit=row6,
         currency=currency
     )
+
+@router.post("/cycles-table", response_model=CyclesTableResponse)
+async def cycles_table(
+    file: UploadFile = File(...),
+    member_id:         Optional[str] = Form(None),
+    threshold_minutes: int = Form(5),
+):
+    """
+    Tüm cycle'lar için karşılaştırma tablosu (cycle başına ayrı /v2/brief çağrısı yerine tek çağrı).
+    Sonuç (dosya SHA-256, parser, member_id, threshold_minutes) anahtarıyla cache'lenir;
+    isabette dosya yalnızca hash'lenir, parse edilmez.
+    """
+    up = await spool_upload(file)
+    try:
+        cache_key = (*up.key, str(member_id or ""), int(threshold_minutes))
+        hit = _table_cache.get(cache_key)
+        if hit is not None:
+            return hit.model_copy(update={"filename": file.filename})
+        df, _ = await parse_upload(up)
+    finally:
+        up.cleanup()
+
+    c_ts  = col(df, "Date & Time", "Date", "timestamp", "time")
+    c_mb  = col(df, "Player ID", "member_id", "User ID", "Account ID")
+    c_rs  = col(df, "Reason", "Description", "Event")
+    c_am  = col(df, "Amount", "Base Amount", "Bet Amount", "Stake")
+    c_ref = col(df, "Reference ID", "Ref ID", "Bet ID", "Ticket")
+    c_cid = col(df, "BetCID", "Bet CID")
+    c_curr= col(df, "Currency", "Base Currency", "System Currency")
+
+    for name, c in [("Date & Time", c_ts), ("Player ID", c_mb), ("Reason", c_rs), ("Amount", c_am)]:
+        if not c:
+            raise HTTPException(status_code=422, detail=f"Eksik kolon: {name}")
+
+    df[c_ts] = to_dt(df[c_ts])
+    df = df.sort_values(c_ts).reset_index(drop=True)
+    df["__r"] = norm_reasons(df[c_rs])
+    df["_amt"] = pd.to_numeric(df[c_am], errors="coerce").fillna(0.0)
+
+    if member_id:
+        df = df[df[c_mb].astype(str) == str(member_id)].reset_index(drop=True)
+    if len(df) == 0:
+        raise HTTPException(status_code=422, detail="Filtre sonrası satır yok.")
+
+    cycles = _cycles_table(df, c_ts, c_ref, c_cid, threshold_minutes)
+    s0 = cycles[0].start_row
+    res = CyclesTableResponse(
+        filename=file.filename,
+        member_id=str(df.iloc[s0][c_mb]),
+        threshold_minutes=int(threshold_minutes),
+        cycles=cycles,
+        currency=(str(df[c_curr].iloc[s0]) if c_curr else None),
+    )
+    _table_cache.set(cache_key, res)
+    return res
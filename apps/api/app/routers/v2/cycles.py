@@ -1,6 +1,6 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Form
 from pydantic import BaseModel
-from app.services.parse import read_df, norm_reason, col, to_dt, payment_str
+from app.services.parse import read_df, norm_reasons, col, to_dt, payment_str
 import pandas as pd
 
 router = APIRouter()
@@ -19,7 +19,7 @@ class CyclesResponse(BaseModel):
 
 @router.post("", response_model=CyclesResponse)
 async def list_cycles(file: UploadFile = File(...), member_id: str | None = Form(None)):
-    df, _ = read_df(file)
+    df, _ = await read_df(file)
     c_ts = col(df, "Date & Time", "Date", "timestamp", "time")
     c_mb = col(df, "Player ID", "member_id", "User ID", "Account ID")
     c_rs = col(df, "Reason", "Description", "Event")
@@ -31,7 +31,7 @@ async def list_cycles(file: UploadFile = File(...), member_id: str | None = Form
             raise HTTPException(status_code=422, detail=f"Eksik kolon: {name}")
 
     df[c_ts] = to_dt(df[c_ts])
-    df["__r"] = df[c_rs].apply(norm_reason)
+    df["__r"] = norm_reasons(df[c_rs])
     df = df.sort_values(c_ts).reset_index(drop=True)
     if member_id:
         df = df[df[c_mb].astype(str) == str(member_id)].reset_index(drop=True)
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Form
 from pydantic import BaseModel
-from app.services.parse import read_df, norm_reason, col, to_dt, payment_str
-from app.services.matchers import build_key
-from app.services.profit import assign_source
+from app.services.parse import read_df, norm_reasons, col, to_dt, payment_str
+from app.services.matchers import build_keys
+from app.services.profit import assign_sources
 
 router = APIRouter()
 
@@ -24,7 +24,7 @@ async def profit_stream(
     cycle_index: int | None = Form(None),
     member_id: str | None = Form(None),
 ):
-    df, _ = read_df(file)
+    df, _ = await read_df(file)
     c_ts = col(df,"Date & Time","Date","timestamp","time")
     c_mb = col(df,"Player ID","member_id","User ID","Account ID")
     c_rs = col(df,"Reason","Description","Event")
@@ -39,7 +39,7 @@ async def profit_stream(
     df[c_ts] = to_dt(df[c_ts])
     df = df.sort_by(c_ts) if hasattr(df, "sort_by") else df.sort_values(c_ts)
     df = df.reset_index(drop=True)
-    df["__r"] = df[c_rs].apply(norm_reason)
+    df["__r"] = norm_reasons(df[c_rs])
     if member_id:
         df = df[df[c_mb].astype(str)==str(member_id)].reset_index(drop=True)
 
@@ -62,10 +62,12 @@ async def profit_stream(
     settled = cyc.index[cyc["__r"]=="BET_SETTLED"].tolist()
     pmap: dict[str, deque] = defaultdict(deque)
     smap: dict[str, deque] = defaultdict(deque)
-    for i in placed:  pmap[build_key(cyc, i, c_ref, c_cid)].append(i)
-    for i in settled: smap[build_key(cyc, i, c_ref, c_cid)].append(i)
+    keys = build_keys(cyc, c_ref, c_cid)
+    for i in placed:  pmap[keys[i]].append(i)
+    for i in settled: smap[keys[i]].append(i)
 
-    rows: list[ProfitRow] = []
+    # (kaynak satırı, settled satırı) sırası korunur; kaynaklar tek seferde atanır
+    pairs: list[tuple[int, int]] = []
     matched_s: set[int] = set()
 
     for key in set(pmap)|set(smap):
@@ -73,14 +75,17 @@ async def profit_stream(
         while ps and ss:
             p_i, s_i = ps.popleft(), ss.popleft()
             matched_s.add(s_i)
-            src, det = assign_source(cyc, p_i, c_pm, c_dt, c_rs, c_am)
-            rows.append(ProfitRow(ts=str(cyc.loc[s_i, c_ts]), source=src, amount=float(cyc.loc[s_i, c_am]), detail=det))
+            pairs.append((p_i, s_i))
 
     for key, ss in smap.items():
         for s_i in ss:
             if s_i in matched_s: continue
-            src, det = assign_source(cyc, s_i, c_pm, c_dt, c_rs, c_am, fallback=True)
-            rows.append(ProfitRow(ts=str(cyc.loc[s_i, c_ts]), source=src, amount=float(cyc.loc[s_i, c_am]), detail=det))
+            pairs.append((s_i, s_i))
+
+    sources = assign_sources(cyc, [p_i for p_i, _ in pairs], c_pm, c_dt, c_rs, c_am)
+    rows: list[ProfitRow] = []
+    for (_, s_i), (src, det) in zip(pairs, sources):
+        rows.append(ProfitRow(ts=str(cyc.loc[s_i, c_ts]), source=src, amount=float(cyc.loc[s_i, c_am]), detail=det))
 
     rows.sort(key=lambda r: r.ts)
     return ProfitStreamResponse(filename=file.filename, cycle_index=cycle_index, member_id=member_val, rows=rows)
@@ -21,7 +21,7 @@ async def upload_summary(file: UploadFile = File(...)):
     - satır sayısı
     """
     try:
-        df, sheets = read_df(file)
+        df, sheets = await read_df(file)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -22,3 +22,21 @@ def build_key(df, idx: int, c_ref: str | None, c_cid: str | None) -> str:
 
     # Fallback: benzersiz label kullan
     return f"F:{idx}"
+
+def build_keys(df, c_ref: str | None, c_cid: str | None, skip_na: bool = False):
+    """
+    build_key'in vektörel hali: tüm satırlar için eşleşme anahtarı (index = df.index).
+    skip_na=True -> brief._key davranışı (pd.isna değerler boş sayılır; NaT/<NA> dahil).
+    """
+    import pandas as pd
+
+    keys = pd.Series("F:" + df.index.astype(str), index=df.index, dtype=object)
+    for prefix, c in (("C:", c_cid), ("R:", c_ref)):  # düşük öncelik önce, R: en son yazar
+        if not c or c not in df.columns:
+            continue
+        v = df[c].astype(str).str.strip()
+        ok = v.ne("") & ~v.str.lower().isin(["nan", "none"])
+        if skip_na:
+            ok &= df[c].notna()
+        keys = keys.mask(ok, prefix + v)
+    return keys
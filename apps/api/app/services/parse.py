@@ -1,35 +1,70 @@
 from fastapi import HTTPException, UploadFile
-from io import BytesIO
+from starlette.concurrency import run_in_threadpool
 from typing import Optional
+import os
+import numpy as np
 import pandas as pd
 
-def read_df(file: UploadFile) -> tuple[pd.DataFrame, list[str]]:
-    name = (file.filename or "").lower()
-    content = file.file.read()
+from app.services.cache import LRUCache
+from app.services.upload import SpooledUpload, spool_upload
 
-    if name.endswith(".csv"):
+# Aynı dosya (SHA-256 + parser) tekrar yüklendiğinde yeniden parse etme. Varsayılan kapalı:
+# her giriş parse edilmiş bir DataFrame'i bellekte tutar (dosya boyutunun birkaç katı).
+_df_cache = LRUCache(maxsize=int(os.getenv("API_DF_CACHE_SIZE", "0")))
+
+def parse_path(up: SpooledUpload) -> tuple[pd.DataFrame, list[str]]:
+    if up.is_csv:
         try:
-            import pyarrow as pa  # noqa
-            df = pd.read_csv(BytesIO(content), engine="pyarrow")
+            import pyarrow as pa
+            with pa.memory_map(up.path, "r") as src:
+                df = pd.read_csv(src, engine="pyarrow")
         except Exception:
-            df = pd.read_csv(BytesIO(content))
+            df = pd.read_csv(up.path, memory_map=True)
         sheets = ["csv"]
-    elif name.endswith((".xlsx", ".xls", ".xlsm")):
+    else:
         try:
-            xls = pd.ExcelFile(BytesIO(content), engine="openpyxl")
-            sheet = xls.sheet_names[0] if xls.sheet_names else None
-            if not sheet:
-                raise ValueError("Sheet yok")
-            df = pd.read_excel(xls, sheet_name=sheet)
-            sheets = xls.sheet_names
+            with pd.ExcelFile(up.path, engine="openpyxl") as xls:
+                sheet = xls.sheet_names[0] if xls.sheet_names else None
+                if not sheet:
+                    raise ValueError("Sheet yok")
+                df = pd.read_excel(xls, sheet_name=sheet)
+                sheets = xls.sheet_names
         except Exception as e:
             raise HTTPException(status_code=422, detail=f"Excel okunamadı: {e}")
-    else:
-        raise HTTPException(status_code=400, detail="Desteklenmeyen dosya")
 
     df.columns = [str(c).strip() for c in df.columns]
     return df, sheets
 
+async def parse_upload(up: SpooledUpload) -> tuple[pd.DataFrame, list[str]]:
+    """
+    Spool edilmiş upload'ı (threadpool'da) parse eder; _df_cache açıksa up.key ile cache'ler.
+    df çağırana aittir, güvenle değiştirilebilir. Temp dosyayı silmek çağırana kalır.
+    """
+    hit = _df_cache.get(up.key)
+    if hit is not None:
+        df, sheets = hit
+        return df.copy(), list(sheets)
+    df, sheets = await run_in_threadpool(parse_path, up)
+    if _df_cache.maxsize:
+        _df_cache.set(up.key, (df.copy(), sheets))
+    return df, list(sheets)
+
+async def read_upload(file: UploadFile) -> tuple[pd.DataFrame, list[str], tuple[str, bool]]:
+    """
+    Upload'ı spool + hash eder, path üzerinden parse eder.
+    (df, sheets, dataset_key) döner; dataset_key = (sha256, is_csv).
+    """
+    up = await spool_upload(file)
+    try:
+        df, sheets = await parse_upload(up)
+    finally:
+        up.cleanup()
+    return df, sheets, up.key
+
+async def read_df(file: UploadFile) -> tuple[pd.DataFrame, list[str]]:
+    df, sheets, _ = await read_upload(file)
+    return df, sheets
+
 def col(df, *cands: str) -> Optional[str]:
     low = {c.lower(): c for c in df.columns}
     for cand in cands:
@@ -77,6 +112,21 @@ def norm_reason(v: object) -> str:
 
     return s.upper()
 
+def norm_reasons(series: pd.Series) -> pd.Series:
+    """
+    norm_reason'ın vektörel hali: her benzersiz değer bir kez normalize edilir.
+    Yalnızca saf string kolonlarda hızlı yol; NA / karışık tipler elemanter (birebir aynı sonuç).
+    """
+    if pd.api.types.infer_dtype(series, skipna=True) != "string":
+        return series.apply(norm_reason)
+    codes, uniq = pd.factorize(series)
+    mapped = np.array([norm_reason(u) for u in uniq] + [""], dtype=object)[codes]
+    out = pd.Series(mapped, index=series.index, dtype=object)
+    na = codes == -1
+    if na.any():
+        out[na] = series[na].apply(norm_reason)
+    return out
+
 def payment_str(row, c_payment: Optional[str], c_details: Optional[str]) -> Optional[str]:
     pm = str(row[c_payment]).strip() if c_payment and row.get(c_payment) is not None else ""
     dt = str(row[c_details]).strip() if c_details and row.get(c_details) is not None else ""
@@ -1,6 +1,20 @@
-from typing import Tuple
+from typing import List, Optional, Tuple
+import numpy as np
 from app.services.parse import norm_reason, payment_str
 
+def _source_at(cyc, j, r: str, c_pm, c_dt, c_rs, c_am) -> Optional[Tuple[str, str | None]]:
+    """Tek satırın kaynak kuralı (assign_source / assign_sources ortak); kaynak değilse None."""
+    if r == "DEPOSIT":
+        return "MAIN", payment_str(cyc.loc[j], c_pm, c_dt)
+    if r == "BONUS_GIVEN":
+        det = str(cyc.loc[j, c_dt] or cyc.loc[j, c_rs] or "Bonus") if c_dt else str(cyc.loc[j, c_rs] or "Bonus")
+        return "BONUS", (det.strip() or "Bonus")
+    if r == "ADJUSTMENT":
+        amt = float(cyc.loc[j, c_am]) if c_am is not None else 0.0
+        if amt > 0:
+            return "ADJUSTMENT", payment_str(cyc.loc[j], c_pm, c_dt)
+    return None
+
 def assign_source(
     cyc,
     idx: int,
@@ -21,15 +35,46 @@ def assign_source(
     first = cyc.index[0]
     while j >= first:
         r = str(cyc.loc[j, "__r"] if "__r" in cyc.columns else norm_reason(cyc.loc[j, c_rs]))
-        if r in ("DEPOSIT", "BONUS_GIVEN", "ADJUSTMENT"):
-            if r == "DEPOSIT":
-                return "MAIN", payment_str(cyc.loc[j], c_pm, c_dt)
-            if r == "BONUS_GIVEN":
-                det = str(cyc.loc[j, c_dt] or cyc.loc[j, c_rs] or "Bonus") if c_dt else str(cyc.loc[j, c_rs] or "Bonus")
-                return "BONUS", (det.strip() or "Bonus")
-            if r == "ADJUSTMENT":
-                amt = float(cyc.loc[j, c_am]) if c_am is not None else 0.0
-                if amt > 0:
-                    return "ADJUSTMENT", payment_str(cyc.loc[j], c_pm, c_dt)
+        src = _source_at(cyc, j, r, c_pm, c_dt, c_rs, c_am)
+        if src is not None:
+            return src
         j -= 1
     return "MAIN", None
+
+def assign_sources(
+    cyc,
+    idxs: List[int],
+    c_pm: str | None,
+    c_dt: str | None,
+    c_rs: str,
+    c_am: str | None,
+) -> List[Tuple[str, str | None]]:
+    """
+    assign_source'un toplu hali: geriye yürümek yerine her satır için
+    "şu ana kadarki son geçerli finansal olay" pozisyonu ileri doldurulur.
+    Kaynak yalnızca finansal satırlar için bir kez hesaplanır.
+    """
+    if not len(idxs):
+        return []
+    r = cyc["__r"] if "__r" in cyc.columns else cyc[c_rs].apply(norm_reason)
+    fin_pos = np.flatnonzero(r.isin(["DEPOSIT", "BONUS_GIVEN", "ADJUSTMENT"]).to_numpy())
+
+    last = np.full(len(cyc), -1, dtype=np.int64)
+    src_at: dict[int, Tuple[str, str | None] | Exception] = {}
+    for p in fin_pos:
+        try:
+            src = _source_at(cyc, cyc.index[p], str(r.iloc[p]), c_pm, c_dt, c_rs, c_am)
+        except Exception as e:  # geriye yürüyüş bu satıra ulaşırsa assign_source da burada patlar
+            src = e
+        if src is not None:
+            src_at[int(p)] = src
+            last[p] = p
+    last = np.maximum.accumulate(last)
+
+    out: List[Tuple[str, str | None]] = []
+    for p in cyc.index.get_indexer(idxs):
+        src = src_at[int(last[p])] if last[p] >= 0 else ("MAIN", None)
+        if isinstance(src, Exception):
+            raise src
+        out.append(src)
+    return out
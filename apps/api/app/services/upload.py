@@ -0,0 +1,136 @@
+from dataclasses import dataclass
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+import hashlib
+import os
+import tempfile
+
+MAX_UPLOAD_BYTES = int(float(os.getenv("API_MAX_UPLOAD_MB", "50")) * 1024 * 1024)
+MULTIPART_OVERHEAD = 64 * 1024  # form alanları + boundary payı (Content-Length kontrolü için)
+CHUNK_SIZE = 1024 * 1024
+
+CSV_EXT = (".csv",)
+EXCEL_EXT = (".xlsx", ".xls", ".xlsm")
+# Karar uzantıdadır; part Content-Type yalnızca uzantıyla açıkça çelişiyorsa reddedilir
+# (tarayıcı/OS'a göre CSV: text/csv, text/x-csv, application/x-csv, text/comma-separated-values, ...).
+CONFLICTING_CONTENT_TYPE_PREFIXES = ("image/", "audio/", "video/", "font/", "model/")
+CONFLICTING_CONTENT_TYPES = {
+    "text/html",
+    "application/xhtml+xml",
+    "application/pdf",
+    "application/json",
+    "application/javascript",
+    "text/javascript",
+}
+
+@dataclass
+class SpooledUpload:
+    filename: str
+    path: str
+    size: int
+    sha256: str
+    owned: bool = True  # False -> Starlette'in kendi spool dosyası; silmek UploadFile'a kalır
+
+    @property
+    def is_csv(self) -> bool:
+        return self.filename.lower().endswith(CSV_EXT)
+
+    @property
+    def key(self) -> tuple[str, bool]:
+        """Veri seti anahtarı: aynı byte'lar farklı parser ile okunursa farklı anahtar."""
+        return (self.sha256, self.is_csv)
+
+    def cleanup(self) -> None:
+        if not self.owned:
+            return
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+def _too_large() -> HTTPException:
+    mb = MAX_UPLOAD_BYTES / (1024 * 1024)
+    return HTTPException(status_code=413, detail=f"Dosya çok büyük (maks. {mb:g} MB)")
+
+def check_upload(file: UploadFile) -> str:
+    """
+    Ucuz metadata kontrolleri (parse/hash öncesi). Not: handler çalıştığında Starlette gövdeyi
+    zaten kendi SpooledTemporaryFile'ına almıştır; gerçek erken red main.py'deki middleware'dedir.
+    - uzantı (.csv / .xlsx / .xls / .xlsm)
+    - part Content-Type (yalnızca uzantıyla çelişen tipler)
+    - bilinen boyut (UploadFile.size / part Content-Length)
+    Uzantıyı (küçük harf) döner.
+    """
+    name = (file.filename or "").lower()
+    ext = os.path.splitext(name)[1]
+    if ext not in CSV_EXT + EXCEL_EXT:
+        raise HTTPException(status_code=400, detail="Desteklenmeyen dosya")
+
+    ctype = (file.content_type or "").split(";")[0].strip().lower()
+    if ctype in CONFLICTING_CONTENT_TYPES or ctype.startswith(CONFLICTING_CONTENT_TYPE_PREFIXES):
+        raise HTTPException(status_code=415, detail=f"Desteklenmeyen içerik tipi: {ctype}")
+
+    size = file.size
+    if size is None:
+        try:
+            size = int(file.headers.get("content-length", "")) if file.headers else None
+        except ValueError:
+            size = None
+    if size is not None and size > MAX_UPLOAD_BYTES:
+        raise _too_large()
+    return ext
+
+def _hash_in_place(src) -> tuple[int, str]:
+    h = hashlib.sha256()
+    size = 0
+    src.seek(0)
+    while True:
+        chunk = src.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > MAX_UPLOAD_BYTES:
+            raise _too_large()
+        h.update(chunk)
+    src.seek(0)
+    return size, h.hexdigest()
+
+def _copy_to_disk(src, suffix: str) -> tuple[str, int, str]:
+    h = hashlib.sha256()
+    size = 0
+    src.seek(0)
+    fd, path = tempfile.mkstemp(prefix="fp-upload-", suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as dst:
+            while True:
+                chunk = src.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise _too_large()
+                h.update(chunk)
+                dst.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path, size, h.hexdigest()
+
+async def spool_upload(file: UploadFile) -> SpooledUpload:
+    """
+    Upload'ı parser'ların path ile açabileceği bir dosya olarak hazırlar ve SHA-256 özetini çıkarır
+    (threadpool'da, parça parça). Özet, parse/sonuç cache'lerinde veri seti anahtarıdır.
+    - Starlette spool dosyası diske taşmışsa (>1 MB) olduğu yerde hash'lenir, ikinci kopya yok.
+    - Bellekteyse (küçük dosya) geçici dosyaya yazılır.
+    Çağıran taraf işi bitince cleanup() çağırmalıdır.
+    """
+    ext = check_upload(file)
+    src = file.file
+    name = getattr(src, "name", None) if getattr(src, "_rolled", False) else None
+    if isinstance(name, int):  # Linux'ta TemporaryFile isimsizdir (O_TMPFILE) -> fd üzerinden path
+        name = f"/proc/self/fd/{name}"
+    if isinstance(name, str) and os.path.isfile(name):
+        size, digest = await run_in_threadpool(_hash_in_place, src)
+        return SpooledUpload(filename=file.filename or "", path=name, size=size, sha256=digest, owned=False)
+    path, size, digest = await run_in_threadpool(_copy_to_disk, src, ext)
+    return SpooledUpload(filename=file.filename or "", path=path, size=size, sha256=digest)
@@ -0,0 +1,8 @@
+"""
+Optimize edilmiş kod yolları için eşdeğerlik + yük test aracı.
+
+  python -m harness.equivalence --seeds 200 --rows 300
+  python -m harness.load --concurrency 16 --requests 200 [--url http://localhost:8000]
+
+apps/api dizininden çalıştırılır.
+"""
@@ -0,0 +1,153 @@
+"""
+Referans vs optimize motor eşdeğerliği (rastgele ledger'lar üzerinde).
+1) Kernel düzeyi: norm_reasons, build_keys (+skip_na), assign_sources, _start_bounds
+2) Endpoint düzeyi: /v2/cycles, /v2/brief, /v2/profit-stream -> birebir aynı yanıt
+3) /v2/brief/cycles-table satırları == cycle başına /v2/brief (Row2/3/4)
+
+  python -m harness.equivalence --seeds 200 --rows 300
+"""
+import argparse
+import sys
+from typing import Any, Callable, List
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers.v2.brief import _start_bounds
+from app.services.matchers import build_keys
+from app.services.parse import col, norm_reasons, to_dt
+from app.services.profit import assign_sources
+from harness.ledger import ledger_csv, random_ledger
+from harness import reference as ref
+
+TABLE_VS_BRIEF = [
+    ("wager_total", "row2_wager", "wager_total"),
+    ("wager_count", "row2_wager", "wager_count"),
+    ("open_total_amount", "row3_open", "open_total_amount"),
+    ("open_count", "row3_open", "open_count"),
+    ("late_gap_count", "row4_late", "late_gap_count"),
+    ("late_gap_total_minutes", "row4_late", "late_gap_total_minutes"),
+]
+
+class Report:
+    def __init__(self, max_show: int = 10):
+        self.checks = 0
+        self.failures: List[str] = []
+        self.max_show = max_show
+
+    def eq(self, name: str, a: Any, b: Any) -> None:
+        self.checks += 1
+        if a != b:
+            self.failures.append(f"{name}\n  ref: {str(a)[:300]}\n  opt: {str(b)[:300]}")
+
+def _outcome(fn: Callable[[], Any]) -> Any:
+    try:
+        return fn()
+    except Exception as e:
+        return f"raises {type(e).__name__}"
+
+def _prepared(seed: int, rows: int) -> pd.DataFrame:
+    """Endpoint'lerdeki read/normalize adımının aynısı (csv round-trip dahil)."""
+    from io import BytesIO
+    df = pd.read_csv(BytesIO(ledger_csv(seed, rows)))
+    df.columns = [str(c).strip() for c in df.columns]
+    df["Date & Time"] = to_dt(df["Date & Time"])
+    df = df.sort_values("Date & Time").reset_index(drop=True)
+    df["__r"] = df["Reason"].apply(ref.norm_reason)
+    df["_amt"] = pd.to_numeric(df["Amount"], errors="coerce").fillna(0.0)
+    return df
+
+def check_kernels(rep: Report, seed: int, rows: int) -> None:
+    raw = random_ledger(seed, rows)
+    rep.eq(f"[{seed}] norm_reasons(raw)", ref.norm_reasons_ref(raw["Reason"]).tolist(), norm_reasons(raw["Reason"]).tolist())
+
+    df = _prepared(seed, rows)
+    rep.eq(f"[{seed}] norm_reasons(csv)", ref.norm_reasons_ref(df["Reason"]).tolist(), norm_reasons(df["Reason"]).tolist())
+    c_ref, c_cid = col(df, "Reference ID"), col(df, "BetCID")
+    for skip_na in (False, True):
+        rep.eq(f"[{seed}] build_keys(skip_na={skip_na})",
+               ref.build_keys_ref(df, c_ref, c_cid, skip_na).tolist(),
+               build_keys(df, c_ref, c_cid, skip_na).tolist())
+    bets_only = df[df["__r"].isin(["BET_PLACED", "BET_SETTLED"])].reset_index(drop=True)  # start event yok
+    for part in (df, df[df["Player ID"].astype(str) == "1"].reset_index(drop=True), bets_only, df.iloc[:0]):
+        rep.eq(f"[{seed}] start_bounds", ref.start_bounds_ref(part, "__r", "_amt"), _start_bounds(part, "__r", "_amt"))
+
+    # assign_source: profit-stream gibi DEPOSIT cycle'ları üzerinde, tüm satırlar için
+    deps = df.index[df["__r"] == "DEPOSIT"].tolist()
+    for i, s in enumerate(deps):
+        e = deps[i + 1] if i + 1 < len(deps) else len(df)
+        cyc = df.iloc[s:e]
+        args = (list(cyc.index), "Payment Method", "Details", "Reason", "Amount")
+        rep.eq(f"[{seed}] assign_sources cycle={i}",
+               _outcome(lambda: ref.assign_sources_ref(cyc, *args)),
+               _outcome(lambda: assign_sources(cyc, *args)))
+
+def _post(client: TestClient, path: str, data: bytes, form: dict) -> tuple[int, Any]:
+    r = client.post(path, files={"file": ("ledger.csv", data, "text/csv")}, data=form)
+    try:
+        return r.status_code, r.json()
+    except ValueError:
+        return r.status_code, r.text
+
+def _endpoint_calls(client: TestClient, data: bytes, members: List[str | None]) -> dict:
+    out = {}
+    for mb in members:
+        base = {"member_id": mb} if mb else {}
+        out[("cycles", mb)] = cyc = _post(client, "/v2/cycles", data, base)
+        n = len(cyc[1]["cycles"]) if cyc[0] == 200 else 1
+        for i in range(n):
+            out[("brief", mb, i)] = _post(client, "/v2/brief", data, {**base, "start_cycle_index": str(i)})
+            out[("profit-stream", mb, i)] = _post(client, "/v2/profit-stream", data, {**base, "cycle_index": str(i)})
+        out[("brief", mb, "all")] = _post(client, "/v2/brief", data, {**base, "start_cycle_index": "0", "end_cycle_index": str(n - 1)})
+        out[("brief", mb, "default")] = _post(client, "/v2/brief", data, base)
+        out[("cycles-table", mb)] = _post(client, "/v2/brief/cycles-table", data, {**base, "threshold_minutes": "5"})
+    return out
+
+def check_endpoints(rep: Report, client: TestClient, seed: int, rows: int) -> None:
+    data = ledger_csv(seed, rows)
+    members = [None, "1", "2"]
+    with ref.reference_engine():
+        expected = _endpoint_calls(client, data, members)
+    got = _endpoint_calls(client, data, members)
+    for k in expected:
+        rep.eq(f"[{seed}] {k}", expected[k], got[k])
+
+    # cycles-table (segmentli tek geçiş) vs cycle başına brief (referans motor)
+    for mb in members:
+        st, table = got[("cycles-table", mb)]
+        if st != 200:
+            continue
+        for row in table["cycles"]:
+            bst, b = expected[("brief", mb, row["index"])]
+            if bst != 200:
+                rep.eq(f"[{seed}] cycles-table mb={mb} i={row['index']} brief status", 200, bst)
+                continue
+            for t_key, b_row, b_key in TABLE_VS_BRIEF:
+                a, z = b[b_row][b_key], row[t_key]
+                # float toplama sırası farklı -> yuvarlama sınırında 1 kuruş tolerans
+                same = abs(a - z) <= 0.011 if isinstance(a, float) else a == z
+                rep.eq(f"[{seed}] cycles-table mb={mb} i={row['index']} {t_key}", a, a if same else z)
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--seeds", type=int, default=50)
+    ap.add_argument("--seed-start", type=int, default=0)
+    ap.add_argument("--rows", type=int, default=300)
+    ap.add_argument("--skip-endpoints", action="store_true")
+    args = ap.parse_args(argv)
+
+    rep = Report()
+    client = TestClient(app, raise_server_exceptions=False)
+    for seed in range(args.seed_start, args.seed_start + args.seeds):
+        check_kernels(rep, seed, args.rows)
+        if not args.skip_endpoints:
+            check_endpoints(rep, client, seed, args.rows)
+
+    for f in rep.failures[:rep.max_show]:
+        print("MISMATCH", f)
+    print(f"{rep.checks} kontrol, {len(rep.failures)} uyuşmazlık ({args.seeds} seed x {args.rows} satır)")
+    return 1 if rep.failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""
+Rastgele (ve bilerek dağınık) ledger üretici.
+- Reference ID: nan / None / "" / "None" / tekrar eden ID'ler
+- BET_SETTLED, BET_PLACED'dan önce gelebilir
+- negatif ADJUSTMENT, free spin akışı, büyük/küçük harf karışık Reason
+"""
+import random
+from typing import Optional
+import pandas as pd
+
+REASONS = (
+    ["BET_PLACED", "bet placed", "Bet_Placed"] * 6
+    + ["BET_SETTLED", "bet settled", "payout"] * 6
+    + ["DEPOSIT", "Yatırım", "BONUS_GIVEN", "FREE_SPIN_GIVEN", "FREE_SPINS_BET", "FREE_SPINS_WINNINGS",
+       "ADJUSTMENT", "manual adjust", "WITHDRAWAL", "withdrawal_decline", "CASINO_BONUS_ACHIEVED", None]
+)
+REFS = ["nan", "None", "", "  ", None]
+GAMES = ["Sweet Bonanza", "Gates of Olympus", "Roulette", "Blackjack", None]
+METHODS = ["Papara", "Havale", "Kripto", None]
+
+def random_ledger(seed: int, rows: int = 300, members: int = 2, start: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    rnd = random.Random(seed)
+    t = start or pd.Timestamp("2024-03-01 09:00")
+    ref_pool = [f"R{rnd.randint(1, max(2, rows // 4))}" for _ in range(max(4, rows // 3))]
+    out = []
+    for _ in range(rows):
+        t += pd.Timedelta(seconds=rnd.choice([0, 0, 5, 30, 120, 600, 3600]))
+        reason = rnd.choice(REASONS)
+        r = str(reason or "").lower()
+        amt = rnd.choice([0, 1, 2.5, 10, 25, 100, 250.75])
+        if "placed" in r or "free_spins_bet" in r:
+            amt = -amt
+        elif "adjust" in r or rnd.random() < 0.05:
+            amt = rnd.choice([-1, 1]) * amt
+        # settled-before-placed: ara sıra geriye düşen zaman damgası (sort sonrası sıra değişir)
+        ts = t - pd.Timedelta(minutes=rnd.randint(1, 30)) if rnd.random() < 0.08 else t
+        out.append({
+            "Date & Time": ts.strftime("%d/%m/%Y %H:%M:%S") if rnd.random() > 0.01 else "",
+            "Player ID": rnd.randint(1, members),
+            "Reason": reason,
+            "Amount": amt,
+            "Reference ID": rnd.choice(ref_pool) if rnd.random() < 0.75 else rnd.choice(REFS),
+            "BetCID": rnd.choice([None, "", f"C{rnd.randint(1, 20)}"]),
+            "Payment Method": rnd.choice(METHODS),
+            "Details": rnd.choice(["", "Hoşgeldin bonusu", "free spin", "cashback", None]),
+            "Game Name": rnd.choice(GAMES),
+            "Currency": "TRY",
+        })
+    return pd.DataFrame(out)
+
+def ledger_csv(seed: int, rows: int = 300, members: int = 2) -> bytes:
+    return random_ledger(seed, rows, members).to_csv(index=False).encode()
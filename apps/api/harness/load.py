@@ -0,0 +1,95 @@
+"""
+Eşzamanlı upload yük testi: throughput + gecikme yüzdelikleri (p50/p90/p99/max).
+--url verilmezse uygulama süreç içinde (ASGI transport) çalıştırılır.
+
+  python -m harness.load --endpoint brief --concurrency 16 --requests 200 --rows 5000
+  python -m harness.load --url http://localhost:8000 --datasets 0   # her istek farklı dosya (cache yok)
+"""
+import argparse
+import asyncio
+import sys
+import time
+from collections import Counter
+from typing import List
+
+import httpx
+
+from harness.ledger import ledger_csv
+
+ENDPOINTS = {
+    "upload-summary": "/v2/upload-summary",
+    "cycles": "/v2/cycles",
+    "brief": "/v2/brief",
+    "profit-stream": "/v2/profit-stream",
+    "cycles-table": "/v2/brief/cycles-table",
+}
+
+def _pct(xs: List[float], p: float) -> float:
+    if not xs:
+        return 0.0
+    xs = sorted(xs)
+    k = min(len(xs) - 1, max(0, int(round(p / 100.0 * len(xs) + 0.5)) - 1))
+    return xs[k]
+
+async def run(url: str | None, endpoint: str, concurrency: int, requests: int, rows: int, datasets: int) -> dict:
+    n_data = datasets if datasets > 0 else requests
+    payloads = [ledger_csv(seed, rows) for seed in range(n_data)]
+    if url:
+        client = httpx.AsyncClient(base_url=url, timeout=300)
+    else:
+        from app.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://harness", timeout=300)
+
+    path = ENDPOINTS[endpoint]
+    sem = asyncio.Semaphore(concurrency)
+    lat: List[float] = []
+    status: Counter = Counter()
+
+    async def one(i: int) -> None:
+        async with sem:
+            t0 = time.perf_counter()
+            try:
+                r = await client.post(path, files={"file": (f"ledger-{i % n_data}.csv", payloads[i % n_data], "text/csv")})
+                status[r.status_code] += 1
+            except httpx.HTTPError as e:
+                status[type(e).__name__] += 1
+            lat.append(time.perf_counter() - t0)
+
+    async with client:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        wall = time.perf_counter() - t0
+
+    return {
+        "endpoint": path,
+        "requests": requests,
+        "concurrency": concurrency,
+        "rows": rows,
+        "bytes_per_upload": sum(map(len, payloads)) // len(payloads),
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(requests / wall, 2) if wall else 0.0,
+        "p50_ms": round(_pct(lat, 50) * 1000, 1),
+        "p90_ms": round(_pct(lat, 90) * 1000, 1),
+        "p99_ms": round(_pct(lat, 99) * 1000, 1),
+        "max_ms": round(max(lat) * 1000, 1) if lat else 0.0,
+        "status": dict(status),
+    }
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", default=None, help="örn. http://localhost:8000 (yoksa süreç içi)")
+    ap.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="brief")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--rows", type=int, default=2000)
+    ap.add_argument("--datasets", type=int, default=4, help="farklı dosya sayısı; 0 = her istek farklı")
+    args = ap.parse_args(argv)
+
+    res = asyncio.run(run(args.url, args.endpoint, args.concurrency, args.requests, args.rows, args.datasets))
+    for k, v in res.items():
+        print(f"{k:>18}: {v}")
+    ok = sum(v for k, v in res["status"].items() if k == 200)
+    return 0 if ok == args.requests else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+Referans (oracle) motoru: orijinal satır-satır implementasyonlar
+(norm_reason, build_key / brief._key, assign_source, eski _start_bounds döngüsü).
+reference_engine() içinde router'lar bu kernel'larla çalışır; dışında optimize kernel'larla.
+"""
+from contextlib import contextmanager
+from typing import List, Tuple
+from unittest import mock
+import pandas as pd
+
+from app.routers.v2 import brief, cycles, profit_stream
+from app.services.matchers import build_key
+from app.services.parse import norm_reason
+from app.services.profit import assign_source
+
+def norm_reasons_ref(series: pd.Series) -> pd.Series:
+    return series.apply(norm_reason)
+
+def build_keys_ref(df, c_ref, c_cid, skip_na: bool = False) -> pd.Series:
+    fn = brief._key if skip_na else build_key
+    return pd.Series([fn(df, i, c_ref, c_cid) for i in df.index], index=df.index, dtype=object)
+
+def assign_sources_ref(cyc, idxs, c_pm, c_dt, c_rs, c_am) -> List[Tuple[str, str | None]]:
+    return [assign_source(cyc, i, c_pm, c_dt, c_rs, c_am) for i in idxs]
+
+def start_bounds_ref(df, reason_col: str, amt_col: str) -> List[Tuple[int, int]]:
+    """brief._start_bounds'un _cycle_labels öncesi (döngülü) hali."""
+    starts = df.index[
+        (df[reason_col].isin(["DEPOSIT", "BONUS_GIVEN"])) |
+        ((df[reason_col] == "ADJUSTMENT") & (df[amt_col] > 0))
+    ].tolist()
+    if not starts:
+        return [(0, len(df))]
+    bounds: List[Tuple[int, int]] = []
+    for i, s in enumerate(starts):
+        e = starts[i + 1] if i + 1 < len(starts) else len(df)
+        bounds.append((int(s), int(e)))
+    return bounds
+
+@contextmanager
+def reference_engine():
+    patches = [
+        mock.patch.object(cycles, "norm_reasons", norm_reasons_ref),
+        mock.patch.object(brief, "norm_reasons", norm_reasons_ref),
+        mock.patch.object(brief, "_start_bounds", start_bounds_ref),
+        mock.patch.object(brief, "build_keys", build_keys_ref),
+        mock.patch.object(profit_stream, "norm_reasons", norm_reasons_ref),
+        mock.patch.object(profit_stream, "build_keys", build_keys_ref),
+        mock.patch.object(profit_stream, "assign_sources", assign_sources_ref),
+    ]
+    brief._table_cache.clear()
+    for p in patches:
+        p.start()
+    try:
+        yield
+    finally:
+        for p in reversed(patches):
+            p.stop()
+        brief._table_cache.clear()